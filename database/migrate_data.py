@@ -47,12 +47,20 @@ Requirements:
 """
 
 import argparse
+import io
+import os
+import queue
 import re
 import sys
-from datetime import date, datetime, timezone
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, datetime
 from pathlib import Path
 
 import psycopg2
+from psycopg2.errors import UniqueViolation
+from psycopg2.extras import execute_batch, execute_values
 
 try:
     from argon2 import PasswordHasher
@@ -121,6 +129,13 @@ LANG_INT_TO_DB = {
     6: 'portuguese',
 }
 
+# Legacy ISO 639-2 lang codes (lowercase) -> camelCase DB strings
+LANG_ISO3_TO_DB = {
+    'fre': 'french', 'fra': 'french', 'eng': 'english',
+    'ger': 'german', 'deu': 'german', 'jpn': 'japanese',
+    'spa': 'spanish', 'por': 'portuguese',
+}
+
 # Legacy audience_type integers -> camelCase strings (migration 042)
 AUDIENCE_TYPE_INT_TO_DB = {
     97:  'general',
@@ -202,22 +217,32 @@ TABLES_DROP_ORDER = [
 # HELPERS
 # =============================================================================
 
+# Patterns used per migrated row, compiled once
+SLUG_RE = re.compile(r'[^a-z0-9]+')
+NON_ISBN_CHARS_RE = re.compile(r'[^0-9X]', re.IGNORECASE)
+KEYWORD_SEP_RE = re.compile(r'\s*,\s*')
+SINGLE_TOKEN_RE = re.compile(r'\S+')
+
+
 def connect_db(url):
-    """Connect to PostgreSQL database."""
-    return psycopg2.connect(url)
+    """Connect to PostgreSQL database (tagged so the sessions show up in pg_stat_activity)."""
+    return psycopg2.connect(url, application_name='elidune-migrate')
 
 
-def ts_to_datetime(value):
-    """Convert a Unix timestamp (int) to a UTC datetime, or None."""
-    if value is None or value == 0:
-        return None
-    if isinstance(value, datetime):
-        return value
-    try:
-        numeric = int(value) if isinstance(value, str) else float(value)
-        return datetime.fromtimestamp(numeric, tz=timezone.utc)
-    except (ValueError, TypeError, OSError, OverflowError):
-        return None
+def configure_bulk_session(conn):
+    """Tune the migration session on the target for bulk loading.
+
+    With synchronous_commit off a commit returns before its WAL is flushed: a
+    crash can lose the last few commits but never corrupts the database, and
+    rerunning the migration redoes them. The memory settings are per session
+    (and per sort), so they stay moderate: --jobs opens one session per worker.
+    """
+    cur = conn.cursor()
+    cur.execute("SET synchronous_commit = off")
+    cur.execute("SET statement_timeout = 0")
+    cur.execute("SET work_mem = '64MB'")
+    cur.execute("SET maintenance_work_mem = '512MB'")
+    conn.commit()
 
 
 def hash_password(plain, hasher):
@@ -229,11 +254,30 @@ def hash_password(plain, hasher):
     return hasher.hash(plain)
 
 
+# Same cost as the server's `Argon2::default()` (argon2 crate: argon2id, 19 MiB,
+# t=2, p=1), so migrated hashes match the ones it writes itself. argon2-cffi's
+# own defaults (64 MiB, t=3, p=4) cost several times more per user.
+ARGON2_PARAMS = {'time_cost': 2, 'memory_cost': 19456, 'parallelism': 1}
+
+
+def hash_passwords_parallel(plains):
+    """Hash a list of plain passwords on all CPU cores; results keep input order.
+
+    argon2-cffi releases the GIL while hashing, so threads sharing one
+    PasswordHasher run in parallel without process start-up or pickling.
+    """
+    if not plains:
+        return []
+    hasher = PasswordHasher(**ARGON2_PARAMS)
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+        return list(pool.map(lambda plain: hash_password(plain, hasher), plains))
+
+
 def slug_from_name(name, fallback_id):
     """Generate a slug from a name string."""
     if not name:
         return f'item_{fallback_id}'
-    slug = re.sub(r'[^a-z0-9]+', '_', name.lower().strip()).strip('_')
+    slug = SLUG_RE.sub('_', name.lower().strip()).strip('_')
     return slug or f'item_{fallback_id}'
 
 
@@ -242,15 +286,220 @@ def legacy_field_looks_like_single_token(s):
     if not isinstance(s, str):
         return False
     t = s.strip()
-    return bool(t) and re.fullmatch(r'\S+', t) is not None
+    return bool(t) and SINGLE_TOKEN_RE.fullmatch(t) is not None
+
+
+# Rows after which the loans loaders commit, so a failure keeps what was
+# written (re-runs skip it through ON CONFLICT) and transactions stay small
+COMMIT_EVERY = 10000
+
+# Minimum seconds between two progress lines of the paged loaders
+PROGRESS_INTERVAL = 5.0
+_last_progress = 0.0
+
+
+def print_progress(done, total, label):
+    """Print `done/total label`, throttled to PROGRESS_INTERVAL (the last page always prints)."""
+    global _last_progress
+    now = time.monotonic()
+    if done < total and now - _last_progress < PROGRESS_INTERVAL:
+        return
+    _last_progress = now
+    print(f"  {done}/{total} {label}")
+
+
+def try_in_savepoint(cursor, run):
+    """Call `run()` under a savepoint and return the resulting cursor.rowcount.
+
+    On a unique violation the savepoint is rolled back (the transaction stays
+    usable) and None is returned so the caller can retry with ON CONFLICT.
+    """
+    cursor.execute("SAVEPOINT bulk_fast_path")
+    try:
+        run()
+    except UniqueViolation:
+        cursor.execute("ROLLBACK TO SAVEPOINT bulk_fast_path")
+        return None
+    written = cursor.rowcount
+    cursor.execute("RELEASE SAVEPOINT bulk_fast_path")
+    return written
+
 
+def batch_insert(cursor, sql, rows, batch_size=1000, template=None, on_conflict=None, fresh=False):
+    """Insert rows with one multi-row VALUES statement per batch (no commit).
 
-def batch_insert(cursor, conn, sql, rows, batch_size=500):
-    """Execute INSERT statements in batches and commit."""
+    `sql` must contain a single `VALUES %s` placeholder (psycopg2 execute_values);
+    `template` optionally overrides the per-row `(%s, ...)` snippet and
+    `on_conflict` is appended to the statement. With `fresh` (target just
+    reset) each batch is first sent without `on_conflict`, which is much
+    cheaper when nothing conflicts, and only retried with it on a unique violation.
+    Returns the number of rows actually written.
+    """
+    safe_sql = f"{sql} {on_conflict}" if on_conflict else sql
+    written = 0
     for i in range(0, len(rows), batch_size):
-        for row in rows[i:i + batch_size]:
-            cursor.execute(sql, row)
-        conn.commit()
+        batch = rows[i:i + batch_size]
+        if fresh and on_conflict:
+            n = try_in_savepoint(cursor, lambda: execute_values(
+                cursor, sql, batch, template=template, page_size=batch_size))
+            if n is not None:
+                written += n
+                continue
+        execute_values(cursor, safe_sql, batch, template=template, page_size=batch_size)
+        written += cursor.rowcount
+    return written
+
+
+# COPY text format: backslash, tab, newline and carriage return must be escaped
+COPY_TEXT_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def _copy_array_element(value):
+    if value is None:
+        return 'NULL'
+    return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def _copy_field(value):
+    """Render one value in COPY text format (None -> \\N, lists -> array literal)."""
+    if value is None:
+        return '\\N'
+    if value is True:
+        return 't'
+    if value is False:
+        return 'f'
+    if isinstance(value, list):
+        value = '{' + ','.join(map(_copy_array_element, value)) + '}'
+    return str(value).translate(COPY_TEXT_ESCAPES)
+
+
+# (table, columns) -> name of its temp staging table in copy_rows(). Callers
+# may load different column subsets of one table, so each set gets its own.
+_copy_stages = {}
+
+
+def copy_rows(cursor, table, columns, rows, key=None, fresh=False):
+    """Bulk-load rows with COPY FROM STDIN (no commit); returns rows written.
+
+    COPY cannot skip conflicting rows, so with `key` (e.g. 'id') rows are
+    copied into a temp staging table and merged with a single INSERT ... SELECT
+    that leaves out keys already in `table` (first staged row wins on
+    duplicates). With `fresh` the rows are first copied straight into `table`,
+    falling back to staging on a unique violation.
+    """
+    if not rows:
+        return 0
+
+    cols = ', '.join(columns)
+    buf = io.StringIO()
+    for row in rows:
+        buf.write('\t'.join(map(_copy_field, row)))
+        buf.write('\n')
+    buf.seek(0)
+
+    if key is None:
+        cursor.copy_expert(f"COPY {table} ({cols}) FROM STDIN", buf)
+        return cursor.rowcount
+
+    if fresh:
+        n = try_in_savepoint(cursor, lambda: cursor.copy_expert(f"COPY {table} ({cols}) FROM STDIN", buf))
+        if n is not None:
+            return n
+        buf.seek(0)
+
+    stage = _copy_stages.setdefault((table, tuple(columns)), f'_copy_{table}_{len(_copy_stages)}')
+    cursor.execute(f"CREATE TEMP TABLE IF NOT EXISTS {stage} AS SELECT {cols} FROM {table} WITH NO DATA")
+    cursor.execute(f"TRUNCATE {stage}")
+    cursor.copy_expert(f"COPY {stage} ({cols}) FROM STDIN", buf)
+    # Anti-join instead of letting ON CONFLICT probe (and discard) every
+    # existing row; ON CONFLICT stays for rows committed concurrently.
+    cursor.execute(f"""
+        INSERT INTO {table} ({cols})
+        SELECT DISTINCT ON (s.{key}) {cols} FROM {stage} s
+        WHERE NOT EXISTS (SELECT 1 FROM {table} t WHERE t.{key} = s.{key})
+        ORDER BY s.{key}, s.ctid
+        ON CONFLICT ({key}) DO NOTHING
+    """)
+    return cursor.rowcount
+
+
+def prepare_statement(cursor, name, sql, nparams):
+    """PREPARE `sql` ($1..$n placeholders) once; returns the matching EXECUTE query.
+
+    Release it with `DEALLOCATE <name>` when done.
+    """
+    cursor.execute(f"PREPARE {name} AS {sql}")
+    return f"EXECUTE {name} ({', '.join(['%s'] * nparams)})"
+
+
+def fetch_ids(cursor, table):
+    """Return the set of ids already present in a target table."""
+    cursor.execute(f"SELECT id FROM {table}")
+    return {r[0] for r in cursor.fetchall()}
+
+
+def iter_pages(conn, name, sql, size=1000):
+    """Yield fetchmany() pages of `sql`, streamed through a named (server-side) cursor."""
+    cur = conn.cursor(name=name)
+    try:
+        cur.execute(sql)
+        while True:
+            rows = cur.fetchmany(size)
+            if not rows:
+                return
+            yield rows
+    finally:
+        cur.close()
+
+
+def prefetch_pages(cursor, size=1000, depth=4):
+    """Yield fetchmany() pages of an executed cursor, read ahead by a background thread.
+
+    Up to `depth` pages are fetched from the source while the caller writes
+    the current one to the target. The thread is the only user of the
+    source connection until the iteration ends.
+    """
+    pages = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def read():
+        try:
+            while not stop.is_set():
+                rows = cursor.fetchmany(size)
+                pages.put(rows)
+                if not rows:
+                    return
+        except Exception as exc:
+            pages.put(exc)
+
+    reader = threading.Thread(target=read, name='prefetch', daemon=True)
+    reader.start()
+    try:
+        while True:
+            rows = pages.get()
+            if isinstance(rows, Exception):
+                raise rows
+            if not rows:
+                return
+            yield rows
+    finally:
+        # Stopped early (error on the write side): unblock the reader and wait
+        stop.set()
+        while reader.is_alive():
+            try:
+                pages.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+
+def values_list(cursor, mapping):
+    """Render a {key: value} mapping as a SQL VALUES list, for a CTE to join on."""
+    return 'VALUES ' + ', '.join(cursor.mogrify('(%s, %s)', item).decode() for item in mapping.items())
+
+
+def public_type_map(pt_name_to_id):
+    """Legacy integer public_type -> target public_types.id (None when not seeded)."""
+    return {legacy: pt_name_to_id.get(name) for legacy, name in PUBLIC_TYPE_INT_TO_NAME.items()}
 
 
 def map_media_type(code):
@@ -269,12 +518,7 @@ def map_lang(value):
     s = str(value).strip()
     if s.lstrip('-').isdigit():
         return LANG_INT_TO_DB.get(int(s))
-    iso_map = {
-        'fre': 'french', 'fra': 'french', 'eng': 'english',
-        'ger': 'german', 'deu': 'german', 'jpn': 'japanese',
-        'spa': 'spanish', 'por': 'portuguese',
-    }
-    return iso_map.get(s.lower(), s if s else None)
+    return LANG_ISO3_TO_DB.get(s.lower(), s if s else None)
 
 
 def map_audience_type(value):
@@ -331,7 +575,7 @@ def legacy_biblio_missing_isbn_and_title(identification, title1, title2=None, ti
     s = str(identification).strip()
     if not s:
         return True
-    cleaned = re.sub(r'[^0-9X]', '', s, flags=re.IGNORECASE).upper()
+    cleaned = NON_ISBN_CHARS_RE.sub('', s).upper()
     return not cleaned
 
 
@@ -340,32 +584,165 @@ def legacy_biblio_missing_isbn_and_title(identification, title1, title2=None, ti
 # =============================================================================
 
 def reset_target_database(conn):
-    """Drop all tables and recreate schema from init_database.sql."""
-    print("Resetting target database...")
-    cur = conn.cursor()
-
-    for table in TABLES_DROP_ORDER:
-        cur.execute(f"DROP TABLE IF EXISTS {table} CASCADE")
-
-    # Drop legacy FTS artifacts (safe no-ops if not present)
-    cur.execute("DROP TRIGGER IF EXISTS items_search_vector_trigger ON items")
-    cur.execute("DROP FUNCTION IF EXISTS items_search_vector_update() CASCADE")
-    cur.execute("DROP FUNCTION IF EXISTS items_search_vector_trigger_fn() CASCADE")
-    cur.execute("DROP FUNCTION IF EXISTS items_rebuild_search_vector(BIGINT) CASCADE")
-    conn.commit()
-    print("  Tables dropped")
+    """Drop all tables and recreate schema from init_database.sql.
 
+    Runs as one transaction: if the schema script fails, the drops roll back too.
+    """
+    print("Resetting target database...")
     init_sql_path = Path(__file__).parent / 'init_database.sql'
     if not init_sql_path.exists():
         print(f"  ERROR: {init_sql_path} not found")
         sys.exit(1)
 
+    cur = conn.cursor()
+
+    # One round trip: a single DROP for all tables (CASCADE makes the listed
+    # order irrelevant), then the legacy FTS artifacts (safe no-ops if not present)
+    cur.execute(f"""
+        DROP TABLE IF EXISTS {', '.join(TABLES_DROP_ORDER)} CASCADE;
+        DROP TRIGGER IF EXISTS items_search_vector_trigger ON items;
+        DROP FUNCTION IF EXISTS items_search_vector_update() CASCADE;
+        DROP FUNCTION IF EXISTS items_search_vector_trigger_fn() CASCADE;
+        DROP FUNCTION IF EXISTS items_rebuild_search_vector(BIGINT) CASCADE;
+    """)
+    print("  Tables dropped")
+
     sql = init_sql_path.read_text(encoding='utf-8')
     cur.execute(sql)
     conn.commit()
     print("  Schema recreated from migrations/001_initial_schema.sql")
 
 
+# Tables loaded in bulk; their secondary indexes and FKs are rebuilt after the load
+BULK_LOAD_TABLES = [
+    'users', 'biblios', 'biblio_authors', 'biblio_series', 'biblio_collections',
+    'items', 'loans', 'loans_archives',
+]
+
+
+def drop_bulk_load_indexes(conn, tables=BULK_LOAD_TABLES):
+    """Drop non-unique indexes and foreign keys on `tables`; returns what restore needs.
+
+    Unique indexes and constraints stay: ON CONFLICT and the duplicate
+    handling of the loaders rely on them.
+    """
+    print("Dropping secondary indexes and foreign keys for bulk load...")
+    cur = conn.cursor()
+
+    cur.execute("""
+        SELECT conrelid::regclass::text, conname, pg_get_constraintdef(oid)
+        FROM pg_constraint
+        WHERE contype = 'f' AND conrelid = ANY(%s::regclass[])
+        ORDER BY 1, 2
+    """, (tables,))
+    foreign_keys = cur.fetchall()
+
+    cur.execute("""
+        SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid)
+        FROM pg_index i
+        WHERE i.indrelid = ANY(%s::regclass[])
+          AND NOT i.indisunique
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)
+        ORDER BY 1
+    """, (tables,))
+    indexes = cur.fetchall()
+
+    for table, name, _ in foreign_keys:
+        cur.execute(f'ALTER TABLE {table} DROP CONSTRAINT "{name}"')
+    for name, _ in indexes:
+        cur.execute(f"DROP INDEX {name}")
+    conn.commit()
+    print(f"  {len(indexes)} indexes and {len(foreign_keys)} foreign keys dropped")
+    return indexes, foreign_keys
+
+
+def _create_index(target_db, definition):
+    """Build one index on a connection of its own (parallel rebuild)."""
+    conn = connect_db(target_db)
+    try:
+        configure_bulk_session(conn)
+        conn.cursor().execute(definition)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def restore_bulk_load_indexes(conn, dropped, target_db=None, jobs=1):
+    """Recreate what drop_bulk_load_indexes() removed.
+
+    With jobs > 1 the indexes are built side by side, one connection each
+    (plain CREATE INDEX only takes a SHARE lock, so builds on the same table
+    do not block each other). Foreign keys come back NOT VALID and are
+    validated afterwards, which checks existing rows without holding an
+    exclusive lock for the scan.
+    """
+    print("Recreating secondary indexes and foreign keys...")
+    indexes, foreign_keys = dropped
+    cur = conn.cursor()
+    definitions = [definition for _, definition in indexes]
+    if jobs > 1 and target_db and len(definitions) > 1:
+        with ThreadPoolExecutor(max_workers=min(jobs, len(definitions))) as pool:
+            list(pool.map(lambda definition: _create_index(target_db, definition), definitions))
+    else:
+        for definition in definitions:
+            cur.execute(definition)
+    for table, name, definition in foreign_keys:
+        cur.execute(f'ALTER TABLE {table} ADD CONSTRAINT "{name}" {definition} NOT VALID')
+    conn.commit()
+    for table, name, _ in foreign_keys:
+        cur.execute(f'ALTER TABLE {table} VALIDATE CONSTRAINT "{name}"')
+    conn.commit()
+    print(f"  {len(indexes)} indexes and {len(foreign_keys)} foreign keys recreated")
+
+
+def set_autovacuum(conn, enabled, tables=BULK_LOAD_TABLES):
+    """Turn autovacuum off on `tables` for a bulk load, or back to the server default.
+
+    Autovacuum only takes a SHARE UPDATE EXCLUSIVE lock, which the loaders'
+    inserts do not block, so it would otherwise scan the tables while they grow.
+    """
+    cur = conn.cursor()
+    for table in tables:
+        if enabled:
+            cur.execute(f"ALTER TABLE {table} RESET (autovacuum_enabled)")
+        else:
+            cur.execute(f"ALTER TABLE {table} SET (autovacuum_enabled = false)")
+    conn.commit()
+
+
+def set_unlogged(conn, tables=BULK_LOAD_TABLES):
+    """Switch those of `tables` no other table references to UNLOGGED; returns them.
+
+    Run after drop_bulk_load_indexes(), once the FKs between bulk tables are
+    gone. A table still referenced from outside the set (holds -> users,
+    inventory_scans -> items, ...) has to stay logged.
+    """
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT t FROM unnest(%s::text[]) AS t
+        WHERE NOT EXISTS (SELECT 1 FROM pg_constraint
+                          WHERE contype = 'f' AND confrelid = t::regclass)
+    """, (tables,))
+    unlogged = [table for table, in cur.fetchall()]
+    for table in unlogged:
+        cur.execute(f"ALTER TABLE {table} SET UNLOGGED")
+    conn.commit()
+    print(f"  {', '.join(unlogged)} set UNLOGGED for the load")
+    return unlogged
+
+
+def set_logged(conn, tables):
+    """Turn the tables set_unlogged() switched back to regular, WAL-logged ones.
+
+    Must run before the FKs come back: a logged table cannot reference an
+    unlogged one.
+    """
+    cur = conn.cursor()
+    for table in tables:
+        cur.execute(f"ALTER TABLE {table} SET LOGGED")
+    conn.commit()
+
+
 # =============================================================================
 # DATA MIGRATION FUNCTIONS
 # =============================================================================
@@ -382,22 +759,26 @@ def migrate_account_types(src, dst):
         FROM account_types
     """)
 
+    # One row per code (last one wins, as with row-by-row upserts): a single
+    # INSERT ... ON CONFLICT DO UPDATE cannot touch the same row twice.
+    by_code = {}
     count = 0
     for row in src_cur.fetchall():
         aid, name, ir, ur, lr, iar, br, sr = row
         code = ACCOUNT_TYPE_ID_TO_CODE.get(aid, f'type_{aid}')
-        dst_cur.execute("""
-            INSERT INTO account_types (code, name, items_rights, users_rights, loans_rights,
-                                       items_archive_rights, holds_rights, settings_rights)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            ON CONFLICT (code) DO UPDATE SET
-                name = EXCLUDED.name, items_rights = EXCLUDED.items_rights,
-                users_rights = EXCLUDED.users_rights, loans_rights = EXCLUDED.loans_rights,
-                items_archive_rights = EXCLUDED.items_archive_rights,
-                holds_rights = EXCLUDED.holds_rights, settings_rights = EXCLUDED.settings_rights
-        """, (code, name, ir, ur, lr, iar, br, sr))
+        by_code[code] = (code, name, ir, ur, lr, iar, br, sr)
         count += 1
 
+    batch_insert(dst_cur, """
+        INSERT INTO account_types (code, name, items_rights, users_rights, loans_rights,
+                                   items_archive_rights, holds_rights, settings_rights)
+        VALUES %s
+        ON CONFLICT (code) DO UPDATE SET
+            name = EXCLUDED.name, items_rights = EXCLUDED.items_rights,
+            users_rights = EXCLUDED.users_rights, loans_rights = EXCLUDED.loans_rights,
+            items_archive_rights = EXCLUDED.items_archive_rights,
+            holds_rights = EXCLUDED.holds_rights, settings_rights = EXCLUDED.settings_rights
+    """, list(by_code.values()))
     dst.commit()
     print(f"  {count} account types migrated")
 
@@ -410,16 +791,19 @@ def migrate_fees(src, dst):
 
     src_cur.execute('SELECT id, "desc", amount FROM fees')
 
+    by_code = {}
     count = 0
     for fee_id, desc, amount in src_cur.fetchall():
-        code = FEE_ID_TO_CODE.get(fee_id, slug_from_name(desc, fee_id))
-        dst_cur.execute("""
-            INSERT INTO fees (code, name, amount)
-            VALUES (%s, %s, %s)
-            ON CONFLICT (code) DO UPDATE SET name = EXCLUDED.name, amount = EXCLUDED.amount
-        """, (code, desc, amount))
+        code = FEE_ID_TO_CODE.get(fee_id) or slug_from_name(desc, fee_id)
+        by_code[code] = (code, desc, amount)
         count += 1
 
+    batch_insert(dst_cur, """
+        INSERT INTO fees (code, name, amount)
+        VALUES %s
+        ON CONFLICT (code) DO UPDATE SET name = EXCLUDED.name, amount = EXCLUDED.amount
+    """, list(by_code.values()))
+
     dst.commit()
     print(f"  {count} fees migrated")
 
@@ -458,7 +842,7 @@ def normalize_birthdate(val):
     return None
 
 
-def migrate_users(src, dst, hash_passwords=True):
+def migrate_users(src, dst, hash_passwords=True, reset=False, share_hashes=False):
     """Migrate users with password hashing and schema transformations.
 
     Source columns: id, login, password, firstname, lastname, email,
@@ -472,126 +856,133 @@ def migrate_users(src, dst, hash_passwords=True):
         public_type (int 97/106/117) -> FK to public_types
 
     Target adds: status, language, 2FA fields (defaults), must_change_password
+
+    With share_hashes, users with the same plain password get the same hash
+    (one Argon2 run per distinct password).
     """
     print("Migrating users...")
 
-    hasher = None
     if hash_passwords:
         if not ARGON2_AVAILABLE:
             print("  ERROR: argon2-cffi required. Install with: pip install argon2-cffi")
             sys.exit(1)
-        hasher = PasswordHasher()
         print("  Password hashing enabled (Argon2)")
 
-    src_cur = src.cursor()
     dst_cur = dst.cursor()
 
     # Load public_types id mapping from target DB (name -> id)
     dst_cur.execute("SELECT id, name FROM public_types")
     pt_name_to_id = {name: pid for pid, name in dst_cur.fetchall()}
 
-    src_cur.execute("""
-        SELECT id, login, password, firstname, lastname, email,
-               addr_street, addr_zip_code, addr_city, phone,
-               account_type_id, fee_id, group_id, barcode,
-               notes, crea_date, modif_date, issue_date,
-               birthdate, archived_date, public_type, sex_id
-        FROM users
+    # Legacy Unix timestamps (0 = unset) are converted to timestamptz by the
+    # source server, so rows arrive with datetimes (or NULL) already in place;
+    # account type, fee and public type ids are mapped there too. Logins must
+    # be unique case-insensitively (the server matches LOWER(login)): a window
+    # count finds clashes and every login of a clash gets an _<id> suffix.
+    users_cur = src.cursor(name='mig_users')
+    users_cur.execute(f"""
+        WITH at_map(id, code) AS ({values_list(dst_cur, ACCOUNT_TYPE_ID_TO_CODE)}),
+             fee_map(id, code) AS ({values_list(dst_cur, FEE_ID_TO_CODE)}),
+             pt_map(id, pt_id) AS ({values_list(dst_cur, public_type_map(pt_name_to_id))})
+        SELECT u.id,
+               CASE WHEN count(*) OVER (PARTITION BY lower(u.clean_login)) = 1
+                    THEN u.clean_login ELSE u.clean_login || '_' || u.id END AS login,
+               u.password, u.firstname, u.lastname, u.email,
+               u.addr_street, u.addr_zip_code, u.addr_city, u.phone,
+               COALESCE(at_map.code, 'guest') AS account_type, fee_map.code AS fee,
+               u.group_id, u.barcode, u.notes,
+               to_timestamp(NULLIF(u.crea_date, 0)) AS crea_date,
+               to_timestamp(NULLIF(u.modif_date, 0)) AS modif_date,
+               to_timestamp(NULLIF(u.issue_date, 0)) AS issue_date,
+               u.birthdate,
+               to_timestamp(NULLIF(u.archived_date, 0)) AS archived_date,
+               pt_map.pt_id AS public_type, u.sex_id
+        FROM (
+            SELECT users.*,
+                   COALESCE(NULLIF(btrim(login, E' \\t\\n\\r\\f\\x0b'), ''), 'user_' || id) AS clean_login
+            FROM users
+        ) u
+        LEFT JOIN at_map ON at_map.id = u.account_type_id
+        LEFT JOIN fee_map ON fee_map.id = u.fee_id
+        LEFT JOIN pt_map ON pt_map.id = u.public_type
     """)
-    rows = src_cur.fetchall()
-
-    # Build unique login map
-    login_counts = {}
-    for row in rows:
-        login = (row[1] or '').strip() or f'user_{row[0]}'
-        key = login.lower()
-        login_counts.setdefault(key, []).append((row[0], login))
-
-    unique_logins = {}
-    for key, entries in login_counts.items():
-        if len(entries) == 1:
-            unique_logins[entries[0][0]] = entries[0][1]
-        else:
-            for uid, login in entries:
-                unique_logins[uid] = f'{login}_{uid}'
 
-    hashed_count = 0
+    BATCH = 1000
     migrated = 0
+    hashed_count = 0
+    by_plain = {}  # --share-password-hashes: plain -> hash, across pages
 
-    for row in rows:
-        (uid, _, raw_pw, firstname, lastname, email,
-         addr_street, addr_zip_code, addr_city, phone,
-         account_type_id, fee_id, group_id, barcode,
-         notes, crea_date, modif_date, issue_date,
-         birthdate, archived_date, public_type_raw, sex_id_raw) = row
-
-        login = unique_logins.get(uid, f'user_{uid}')
-        email = email.strip() if email and email.strip() else None
-
-        # UNIQUE(barcode): empty string would collide for many rows; store NULL instead
-        if barcode is None or (isinstance(barcode, str) and not barcode.strip()):
-            barcode = None
-        elif isinstance(barcode, str):
-            barcode = barcode.strip()
-
-        password = None
-        if hash_passwords and raw_pw:
-            password = hash_password(raw_pw, hasher)
-            if password != raw_pw:
-                hashed_count += 1
-
-        account_type = ACCOUNT_TYPE_ID_TO_CODE.get(account_type_id, 'guest')
-        fee = FEE_ID_TO_CODE.get(fee_id) if fee_id else None
-
-        crea_dt = ts_to_datetime(crea_date)
-        modif_dt = ts_to_datetime(modif_date)
-        issue_dt = ts_to_datetime(issue_date)
-        archived_dt = ts_to_datetime(archived_date)
-
-        status = "deleted" if archived_dt else "active"
-        sex = "m" if sex_id_raw == 77 else "f" if sex_id_raw == 70 else None
-        birthdate_db = normalize_birthdate(birthdate)
-
-        # Map legacy integer public_type to FK id in target
-        pt_id = None
-        if public_type_raw is not None:
-            pt_name = PUBLIC_TYPE_INT_TO_NAME.get(int(public_type_raw))
-            if pt_name:
-                pt_id = pt_name_to_id.get(pt_name)
-
-            # print request
-          
-
-        dst_cur.execute("""
+    for rows in prefetch_pages(users_cur, BATCH):
+        # Argon2 is CPU-bound by design: hash the page's plain passwords on a
+        # thread pool (argon2-cffi releases the GIL while hashing) instead of
+        # one at a time inside the row loop.
+        hashed = {}
+        if hash_passwords:
+            to_hash = [(row[0], row[2]) for row in rows
+                       if row[2] and not row[2].startswith('$argon2')]
+            if share_hashes:
+                # One salt per distinct password: equal hashes then reveal which
+                # users share a password, hence opt-in only.
+                distinct = [pw for pw in dict.fromkeys(pw for _, pw in to_hash) if pw not in by_plain]
+                by_plain.update(zip(distinct, hash_passwords_parallel(distinct)))
+                hashed = {uid: by_plain[pw] for uid, pw in to_hash}
+            else:
+                hashes = hash_passwords_parallel([pw for _, pw in to_hash])
+                hashed = {uid: h for (uid, _), h in zip(to_hash, hashes)}
+        hashed_count += len(hashed)
+        user_rows = []
+
+        for row in rows:
+            (uid, login, raw_pw, firstname, lastname, email,
+             addr_street, addr_zip_code, addr_city, phone,
+             account_type, fee, group_id, barcode,
+             notes, crea_dt, modif_dt, issue_dt,
+             birthdate, archived_dt, pt_id, sex_id_raw) = row
+
+            email = email.strip() if email and email.strip() else None
+
+            # UNIQUE(barcode): empty string would collide for many rows; store NULL instead
+            if barcode is None or (isinstance(barcode, str) and not barcode.strip()):
+                barcode = None
+            elif isinstance(barcode, str):
+                barcode = barcode.strip()
+
+            password = None
+            if hash_passwords and raw_pw:
+                password = hashed.get(uid, raw_pw)
+
+            status = "deleted" if archived_dt else "active"
+            sex = "m" if sex_id_raw == 77 else "f" if sex_id_raw == 70 else None
+            birthdate_db = normalize_birthdate(birthdate)
+
+            user_rows.append((
+                uid, login, password, firstname, lastname, email,
+                addr_street, addr_zip_code, addr_city, phone,
+                account_type, fee, group_id, barcode, notes,
+                pt_id, status, birthdate_db,
+                crea_dt, modif_dt, issue_dt, archived_dt,
+                sex,
+            ))
+
+        batch_insert(dst_cur, """
             INSERT INTO users (
                 id, login, password, firstname, lastname, email,
                 addr_street, addr_zip_code, addr_city, phone,
                 account_type, fee, group_id, barcode, notes,
                 public_type, status, birthdate,
                 created_at, update_at, expiry_at, archived_at,
-                language, sex
-            ) VALUES (
-                %s, %s, %s, %s, %s, %s,
-                %s, %s, %s, %s,
-                %s, %s, %s, %s, %s,
-                %s, %s, %s,
-                %s, %s, %s, %s,
-                'french', %s
-            ) ON CONFLICT (id) DO UPDATE SET
+                sex, language
+            ) VALUES %s
+        """, user_rows, template=f"({', '.join(['%s'] * 23)}, 'french')", on_conflict="""
+            ON CONFLICT (id) DO UPDATE SET
                 login = EXCLUDED.login,
                 password = EXCLUDED.password,
                 firstname = EXCLUDED.firstname,
                 lastname = EXCLUDED.lastname
-        """, (
-            uid, login, password, firstname, lastname, email,
-            addr_street, addr_zip_code, addr_city, phone,
-            account_type, fee, group_id, barcode, notes,
-            pt_id, status, birthdate_db,
-            crea_dt, modif_dt, issue_dt, archived_dt,
-            sex,
-        ))
-        migrated += 1
+        """, fresh=reset)
+        migrated += len(user_rows)
 
+    users_cur.close()
     dst.commit()
     parts = [f"{migrated} users migrated"]
     if hash_passwords:
@@ -599,72 +990,66 @@ def migrate_users(src, dst, hash_passwords=True):
     print(f"  {', '.join(parts)}")
 
 
-def migrate_simple_table(src, dst, table, columns, conflict_col="id"):
+def migrate_simple_table(src, dst, table, columns, conflict_col="id", reset=False):
     """Migrate a table with identical source/target structure."""
     print(f"Migrating {table}...")
-    src_cur = src.cursor()
     dst_cur = dst.cursor()
 
     cols_str = ", ".join(columns)
-    placeholders = ", ".join(["%s"] * len(columns))
-
-    src_cur.execute(f"SELECT {cols_str} FROM {table}")
-    rows = src_cur.fetchall()
 
-    for row in rows:
-        dst_cur.execute(f"""
-            INSERT INTO {table} ({cols_str})
-            VALUES ({placeholders})
-            ON CONFLICT ({conflict_col}) DO NOTHING
-        """, row)
+    count = 0
+    for rows in iter_pages(src, f'mig_{table}', f"SELECT {cols_str} FROM {table}"):
+        copy_rows(dst_cur, table, columns, rows, key=conflict_col, fresh=reset)
+        count += len(rows)
 
     dst.commit()
-    print(f"  {len(rows)} {table} migrated")
+    print(f"  {count} {table} migrated")
 
 
-def migrate_editions(src, dst):
+def migrate_editions(src, dst, reset=False):
     """Migrate editions: name -> publisher_name, place -> place_of_publication."""
     print("Migrating editions...")
-    src_cur = src.cursor()
     dst_cur = dst.cursor()
 
-    src_cur.execute("SELECT id, key, name, place, notes FROM editions")
-    rows = src_cur.fetchall()
-
-    for eid, key, name, place, notes in rows:
-        dst_cur.execute("""
-            INSERT INTO editions (id, key, publisher_name, place_of_publication, notes)
-            VALUES (%s, %s, %s, %s, %s)
-            ON CONFLICT (id) DO NOTHING
-        """, (eid, key, name, place, notes))
+    count = 0
+    for rows in iter_pages(src, 'mig_editions', "SELECT id, key, name, place, notes FROM editions"):
+        copy_rows(dst_cur, 'editions', ['id', 'key', 'publisher_name', 'place_of_publication', 'notes'],
+                  rows, key='id', fresh=reset)
+        count += len(rows)
 
     dst.commit()
-    print(f"  {len(rows)} editions migrated")
+    print(f"  {count} editions migrated")
 
 
-def migrate_collections(src, dst):
+def migrate_collections(src, dst, reset=False):
     """Migrate collections: title1 -> name (main display title), title2/3 -> secondary/tertiary_title."""
     print("Migrating collections...")
-    src_cur = src.cursor()
     dst_cur = dst.cursor()
 
-    src_cur.execute("SELECT id, key, title1, title2, title3, issn FROM collections")
-    rows = src_cur.fetchall()
-
-    for cid, key, t1, t2, t3, issn in rows:
+    count = 0
+    for rows in iter_pages(src, 'mig_collections', "SELECT id, key, title1, title2, title3, issn FROM collections"):
         # name (formerly primary_title) must be non-null; fall back to key or generated value
-        name = t1 or key or f"Collection {cid}"
-        dst_cur.execute("""
-            INSERT INTO collections (id, key, name, secondary_title, tertiary_title, issn)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            ON CONFLICT (id) DO NOTHING
-        """, (cid, key, name, t2, t3, issn))
+        copy_rows(dst_cur, 'collections', ['id', 'key', 'name', 'secondary_title', 'tertiary_title', 'issn'],
+                  [(cid, key, t1 or key or f"Collection {cid}", t2, t3, issn)
+                   for cid, key, t1, t2, t3, issn in rows],
+                  key='id', fresh=reset)
+        count += len(rows)
 
     dst.commit()
-    print(f"  {len(rows)} collections migrated")
+    print(f"  {count} collections migrated")
+
+
+BIBLIO_COLUMNS = [
+    'id', 'media_type', 'isbn', 'title', 'subject', 'audience_type',
+    'lang', 'lang_orig', 'publication_date',
+    'source_id', 'edition_id', 'page_extent', 'format',
+    'table_of_contents', 'accompanying_material', 'abstract', 'notes',
+    'keywords', 'is_valid',
+    'created_at', 'updated_at', 'archived_at',
+]
 
 
-def migrate_items(src, dst):
+def migrate_items(src, dst, reset=False):
     """Migrate items from legacy schema to new MARC-aligned schema.
 
     Source columns (legacy):
@@ -699,29 +1084,34 @@ def migrate_items(src, dst):
 
     BATCH = 1000
     offset = 0
+    items_cur = src.cursor(name='mig_items')
     item_authors_batch = []
     item_series_batch = []
     item_collections_batch = []
     skipped_biblio_ids = set()
     skipped_biblios = 0
 
-    while offset < total:
-        src_cur.execute(f"""
-            SELECT id, media_type, identification, publication_date,
-                   lang, lang_orig, title1, title2, title3, title4,
-                   author1_ids, author1_functions,
-                   author2_ids, author2_functions,
-                   author3_ids, author3_functions,
-                   serie_id, serie_vol_number,
-                   collection_id, collection_number_sub, collection_vol_number,
-                   source_id, subject, public_type,
-                   edition_id, nb_pages, format, content, addon,
-                   abstract, notes, keywords, is_valid,
-                   is_archive, archived_timestamp, crea_date, modif_date
-            FROM items ORDER BY id LIMIT {BATCH} OFFSET {offset}
-        """)
-
-        for row in src_cur.fetchall():
+    items_cur.execute("""
+        SELECT id, media_type, identification, publication_date,
+               lang, lang_orig, title1, title2, title3, title4,
+               author1_ids, author1_functions,
+               author2_ids, author2_functions,
+               author3_ids, author3_functions,
+               serie_id, serie_vol_number,
+               collection_id, collection_number_sub, collection_vol_number,
+               source_id, subject, public_type,
+               edition_id, nb_pages, format, content, addon,
+               abstract, notes, keywords, is_valid,
+               CASE WHEN is_archive = 1
+                    THEN to_timestamp(NULLIF(archived_timestamp, 0)) END AS archived_at,
+               to_timestamp(NULLIF(crea_date, 0)) AS crea_date,
+               to_timestamp(NULLIF(modif_date, 0)) AS modif_date
+        FROM items ORDER BY id
+    """)
+
+    for rows in prefetch_pages(items_cur, BATCH):
+        biblio_rows = []
+        for row in rows:
             (iid, media_type_raw, identification, publication_date,
              lang_raw, lang_orig_raw, title1, title2, title3, title4,
              author1_ids, author1_functions,
@@ -732,7 +1122,7 @@ def migrate_items(src, dst):
              source_id, subject, public_type_raw,
              edition_id, nb_pages, fmt, content, addon,
              abstract_, notes, keywords, is_valid,
-             is_archive, archived_timestamp, crea_date_raw, modif_date_raw) = row
+             archived_at, crea_dt, modif_dt) = row
 
             if legacy_biblio_missing_isbn_and_title(
                 identification, title1, title2, title3, title4
@@ -744,7 +1134,7 @@ def migrate_items(src, dst):
             if identification is None:
                 isbn_norm = None
             else:
-                isbn_norm = re.sub(r'[^0-9X]', '', str(identification).strip(), flags=re.IGNORECASE).upper()
+                isbn_norm = NON_ISBN_CHARS_RE.sub('', str(identification).strip()).upper()
                 isbn_norm = isbn_norm or None
 
             title_for_biblio = legacy_biblio_primary_title(title1, title2, title3, title4)
@@ -754,12 +1144,6 @@ def migrate_items(src, dst):
             lang_orig = map_lang(lang_orig_raw)
             audience_type = map_audience_type(public_type_raw)
 
-            archived_ts = ts_to_datetime(archived_timestamp)
-            crea_dt = ts_to_datetime(crea_date_raw)
-            modif_dt = ts_to_datetime(modif_date_raw)
-
-            archived_at = archived_ts if (is_archive == 1) else None
-
             source_id = legacy_fk_id(source_id)
             edition_id = legacy_fk_id(edition_id)
             serie_fk = legacy_fk_id(serie_id)
@@ -771,25 +1155,9 @@ def migrate_items(src, dst):
                 if isinstance(keywords, list):
                     keywords_arr = [k.strip() for k in keywords if k and k.strip()]
                 elif isinstance(keywords, str) and keywords.strip():
-                    keywords_arr = [k.strip() for k in re.split(r'\s*,\s*', keywords) if k.strip()]
-
-            dst_cur.execute("""
-                INSERT INTO biblios (
-                    id, media_type, isbn, title, subject, audience_type,
-                    lang, lang_orig, publication_date,
-                    source_id, edition_id, page_extent, format,
-                    table_of_contents, accompanying_material, abstract, notes,
-                    keywords, is_valid,
-                    created_at, updated_at, archived_at
-                ) VALUES (
-                    %s,%s,%s,%s,%s,%s,
-                    %s,%s,%s,
-                    %s,%s,%s,%s,
-                    %s,%s,%s,%s,
-                    %s,%s,
-                    %s,%s,%s
-                ) ON CONFLICT (id) DO NOTHING
-            """, (
+                    keywords_arr = [k.strip() for k in KEYWORD_SEP_RE.split(keywords) if k.strip()]
+
+            biblio_rows.append((
                 iid, media_type, isbn_norm, title_for_biblio, subject, audience_type,
                 lang, lang_orig, publication_date,
                 source_id, edition_id, nb_pages, fmt,
@@ -823,64 +1191,61 @@ def migrate_items(src, dst):
                     item_authors_batch.append((iid, aid, function, 0, position))
                     position += 1
 
-        dst.commit()
-        offset += BATCH
-        print(f"  {min(offset, total)}/{total} items")
+        copy_rows(dst_cur, 'biblios', BIBLIO_COLUMNS, biblio_rows, key='id', fresh=reset)
+        offset += len(rows)
+        print_progress(offset, total, "items")
+
+    items_cur.close()
 
     print(
         f"  {total - skipped_biblios} biblios migrated, "
         f"{skipped_biblios} skipped (no ISBN and no title in title1-4)"
     )
 
+    # Junction rows pointing at a series/collection/author missing from the
+    # target would fail their FK and abort a whole batch: filter them first.
     print("  Migrating biblio_series...")
-    for i in range(0, len(item_series_batch), 500):
-        for entry in item_series_batch[i:i + 500]:
-            try:
-                dst_cur.execute("""
-                    INSERT INTO biblio_series (biblio_id, series_id, position, volume_number)
-                    VALUES (%s, %s, %s, %s)
-                    ON CONFLICT (biblio_id, series_id) DO NOTHING
-                """, entry)
-            except Exception:
-                dst.rollback()
-        dst.commit()
-    print(f"  {len(item_series_batch)} biblio_series rows migrated")
+    series_ids = fetch_ids(dst_cur, 'series')
+    item_series_batch = [e for e in item_series_batch if e[1] in series_ids]
+    n = batch_insert(dst_cur, """
+        INSERT INTO biblio_series (biblio_id, series_id, position, volume_number)
+        VALUES %s
+    """, item_series_batch, on_conflict="ON CONFLICT (biblio_id, series_id) DO NOTHING", fresh=reset)
+    print(f"  {n} biblio_series rows migrated")
 
     print("  Migrating biblio_collections...")
-    for i in range(0, len(item_collections_batch), 500):
-        for entry in item_collections_batch[i:i + 500]:
-            try:
-                dst_cur.execute("""
-                    INSERT INTO biblio_collections (biblio_id, collection_id, position, volume_number)
-                    VALUES (%s, %s, %s, %s)
-                    ON CONFLICT (biblio_id, collection_id) DO NOTHING
-                """, entry)
-            except Exception:
-                dst.rollback()
-        dst.commit()
-    print(f"  {len(item_collections_batch)} biblio_collections rows migrated")
-
-    # Insert biblio_authors in batches
+    collection_ids = fetch_ids(dst_cur, 'collections')
+    item_collections_batch = [e for e in item_collections_batch if e[1] in collection_ids]
+    n = batch_insert(dst_cur, """
+        INSERT INTO biblio_collections (biblio_id, collection_id, position, volume_number)
+        VALUES %s
+    """, item_collections_batch, on_conflict="ON CONFLICT (biblio_id, collection_id) DO NOTHING", fresh=reset)
+    print(f"  {n} biblio_collections rows migrated")
+
+    # Legacy items repeat (author, function) pairs, so these conflict even on a
+    # fresh target: no point trying the plain INSERT first.
     print("  Migrating biblio_authors...")
-    ia_count = 0
-    for i in range(0, len(item_authors_batch), 500):
-        for entry in item_authors_batch[i:i + 500]:
-            try:
-                dst_cur.execute("""
-                    INSERT INTO biblio_authors (biblio_id, author_id, function, author_type, position)
-                    VALUES (%s, %s, %s, %s, %s)
-                    ON CONFLICT (biblio_id, author_id, function) DO NOTHING
-                """, entry)
-                ia_count += 1
-            except Exception:
-                dst.rollback()
-        dst.commit()
-    print(f"  {ia_count} biblio_authors migrated")
+    author_ids = fetch_ids(dst_cur, 'authors')
+    item_authors_batch = [e for e in item_authors_batch if e[1] in author_ids]
+    n = batch_insert(dst_cur, """
+        INSERT INTO biblio_authors (biblio_id, author_id, function, author_type, position)
+        VALUES %s
+        ON CONFLICT (biblio_id, author_id, function) DO NOTHING
+    """, item_authors_batch)
+    print(f"  {n} biblio_authors migrated")
 
+    dst.commit()
     return skipped_biblio_ids
 
 
-def migrate_specimens(src, dst, skipped_biblio_ids=None):
+ITEM_COLUMNS = [
+    'id', 'biblio_id', 'source_id', 'barcode', 'call_number', 'place',
+    'borrowable', 'circulation_status', 'notes', 'price',
+    'updated_at', 'archived_at', 'created_at',
+]
+
+
+def migrate_specimens(src, dst, skipped_biblio_ids=None, reset=False):
     """Migrate specimens (physical copies) into the new `items` table.
 
     Source columns (legacy specimens):
@@ -917,18 +1282,25 @@ def migrate_specimens(src, dst, skipped_biblio_ids=None):
     BATCH = 1000
     offset = 0
 
-    while offset < total:
-        src_cur.execute(f"""
-            SELECT id, id_item, source_id, identification, cote, place,
-                   status, codestat, notes, price, modif_date,
-                   is_archive, archive_date, crea_date
-            FROM specimens ORDER BY id LIMIT {BATCH} OFFSET {offset}
-        """)
+    # ORDER BY id: the first specimen by id keeps a duplicated barcode
+    specimens_cur = src.cursor(name='mig_specimens')
+    specimens_cur.execute("""
+        SELECT id, id_item, source_id, identification, cote, place,
+               status, codestat, notes, price,
+               to_timestamp(NULLIF(modif_date, 0)) AS modif_date,
+               -- is_archive=1 means archived; ensure archived_at is set
+               COALESCE(to_timestamp(NULLIF(archive_date, 0)),
+                        CASE WHEN is_archive = 1 THEN now() END) AS archive_date,
+               to_timestamp(NULLIF(crea_date, 0)) AS crea_date
+        FROM specimens ORDER BY id
+    """)
 
-        for row in src_cur.fetchall():
+    for rows in prefetch_pages(specimens_cur, BATCH):
+        item_rows = []
+        for row in rows:
             (sid, id_item, source_id, identification, cote, place,
-             borrow_status, codestat, notes, price, modif_date_raw,
-             is_archive, archive_date_raw, crea_date_raw) = row
+             borrow_status, codestat, notes, price, updated_dt,
+             archived_dt, created_dt) = row
 
             legacy_bid = None
             if id_item is not None:
@@ -947,14 +1319,6 @@ def migrate_specimens(src, dst, skipped_biblio_ids=None):
             elif borrow_status == 98:
                 borrowable = True
 
-            updated_dt = ts_to_datetime(modif_date_raw)
-            archived_dt = ts_to_datetime(archive_date_raw)
-            created_dt = ts_to_datetime(crea_date_raw)
-
-            # is_archive=1 means archived; ensure archived_at is set
-            if is_archive == 1 and archived_dt is None:
-                archived_dt = datetime.now(tz=timezone.utc)
-
             biblio_id = legacy_fk_id(id_item)
             source_id = legacy_fk_id(source_id)
 
@@ -980,24 +1344,20 @@ def migrate_specimens(src, dst, skipped_biblio_ids=None):
                 
 
 
-            dst_cur.execute("""
-                INSERT INTO items (
-                    id, biblio_id, source_id, barcode, call_number, place,
-                    borrowable, circulation_status, notes, price,
-                    updated_at, archived_at, created_at
-                ) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
-                ON CONFLICT (id) DO NOTHING
-            """, (
+            item_rows.append((
                 sid, biblio_id, source_id, barcode, cote, place,
                 borrowable, codestat, notes, price,
                 updated_dt, archived_dt, created_dt,
             ))
             migrated_specimen_ids.add(sid)
 
-        dst.commit()
-        offset += BATCH
-        print(f"  {min(offset, total)}/{total} items (physical copies)")
+        copy_rows(dst_cur, 'items', ITEM_COLUMNS, item_rows, key='id', fresh=reset)
+        offset += len(rows)
+        print_progress(offset, total, "items (physical copies)")
 
+    specimens_cur.close()
+
+    dst.commit()
     print(
         f"  {len(migrated_specimen_ids)} items (physical copies) migrated"
         + (f", {skipped_for_skipped_biblio} skipped (biblio not migrated)" if skipped_for_skipped_biblio else "")
@@ -1011,7 +1371,7 @@ def migrate_specimens(src, dst, skipped_biblio_ids=None):
     return migrated_specimen_ids
 
 
-def migrate_loans(src, dst, migrated_specimen_ids=None):
+def migrate_loans(src, dst, migrated_specimen_ids=None, reset=False):
     """Migrate borrows -> loans + loans_archives.
 
     Legacy borrows columns: id, user_id, specimen_id, date (int), renew_date (int),
@@ -1022,83 +1382,83 @@ def migrate_loans(src, dst, migrated_specimen_ids=None):
     Returned loans (returned_date set) -> loans_archives with user enrichment
     """
     print("Migrating borrows -> loans/loans_archives...")
-    src_cur = src.cursor()
     dst_cur = dst.cursor()
 
-    # Load user info for archive enrichment
-    src_cur.execute("SELECT id, addr_city, account_type_id, public_type FROM users")
-    user_info = {}
-    for uid, city, at_id, pt in src_cur.fetchall():
-        at_code = ACCOUNT_TYPE_ID_TO_CODE.get(at_id, 'guest') if at_id else 'guest'
-        user_info[uid] = (city, at_code, pt)
-
     # Load public_type FK mapping from target
     dst_cur.execute("SELECT id, name FROM public_types")
     pt_name_to_id = {name: pid for pid, name in dst_cur.fetchall()}
 
-    src_cur.execute("""
-        SELECT id, user_id, specimen_id, item_id, date, renew_date,
-               nb_renews, issue_date, notes, returned_date
-        FROM borrows
+    # Borrower details for archived loans are joined in on the source side
+    borrows_cur = src.cursor(name='mig_borrows')
+    borrows_cur.execute(f"""
+        WITH at_map(id, code) AS ({values_list(dst_cur, ACCOUNT_TYPE_ID_TO_CODE)}),
+             pt_map(id, pt_id) AS ({values_list(dst_cur, public_type_map(pt_name_to_id))})
+        SELECT b.id, b.user_id, b.specimen_id, b.item_id,
+               to_timestamp(NULLIF(b.date, 0)) AS date,
+               to_timestamp(NULLIF(b.renew_date, 0)) AS renew_date,
+               b.nb_renews,
+               to_timestamp(NULLIF(b.issue_date, 0)) AS issue_date,
+               b.notes,
+               to_timestamp(NULLIF(b.returned_date, 0)) AS returned_date,
+               u.addr_city, COALESCE(at_map.code, 'guest') AS account_type,
+               pt_map.pt_id AS borrower_public_type
+        FROM borrows b
+        LEFT JOIN users u ON u.id = b.user_id
+        LEFT JOIN at_map ON at_map.id = u.account_type_id
+        LEFT JOIN pt_map ON pt_map.id = u.public_type
     """)
-    borrows = src_cur.fetchall()
 
+    BATCH = 1000
+    processed = 0
     active = 0
     archived = 0
     skipped = 0
+    uncommitted = 0
 
-    for row in borrows:
-        vals = list(row)
-        user_id = vals[1]
-        item_id = legacy_fk_id(vals[2])  # legacy specimen_id -> items.id; 0 means no copy
-        returned_date_raw = vals[9]
+    for borrows in prefetch_pages(borrows_cur, BATCH):
+        processed += len(borrows)
+        active_rows = []
+        archived_rows = []
 
-        vals[4] = ts_to_datetime(vals[4])   # date -> timestamptz
-        vals[5] = ts_to_datetime(vals[5])   # renew_date -> renew_at
-        vals[7] = ts_to_datetime(vals[7])   # issue_date -> expiry_at
-        vals[9] = ts_to_datetime(vals[9])   # returned_date -> returned_at
+        for (bid, user_id, specimen_id, _, loan_date, renew_date,
+             nb_renews, issue_date, notes, returned_date, city, at_code, pt_id) in borrows:
+            item_id = legacy_fk_id(specimen_id)  # legacy specimen_id -> items.id; 0 means no copy
 
-        if item_id is None:
-            skipped += 1
-            continue
-        if migrated_specimen_ids is not None and item_id not in migrated_specimen_ids:
-            skipped += 1
-            continue
-
-        if returned_date_raw and returned_date_raw != 0:
-            city, at_code, pt_raw = user_info.get(user_id, (None, 'guest', None))
-
-            pt_id = None
-            if pt_raw is not None:
-                pt_name = PUBLIC_TYPE_INT_TO_NAME.get(int(pt_raw))
-                if pt_name:
-                    pt_id = pt_name_to_id.get(pt_name)
-
-            dst_cur.execute("""
-                INSERT INTO loans_archives (
-                    id, user_id, item_id, date, nb_renews,
-                    expiry_at, returned_at, notes,
-                    borrower_public_type, addr_city, account_type
-                ) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
-                ON CONFLICT (id) DO NOTHING
-            """, (
-                vals[0], user_id, item_id,
-                vals[4], vals[6], vals[7], vals[9], vals[8],
-                pt_id, city, at_code,
-            ))
-            archived += 1
-        else:
-            dst_cur.execute("""
-                INSERT INTO loans (
-                    id, user_id, item_id, date, renew_at,
-                    nb_renews, expiry_at, notes, returned_at
-                ) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)
-                ON CONFLICT (id) DO NOTHING
-            """, (vals[0], vals[1], item_id, vals[4], vals[5], vals[6], vals[7], vals[8], vals[9]))
-            active += 1
+            if item_id is None:
+                skipped += 1
+                continue
+            if migrated_specimen_ids is not None and item_id not in migrated_specimen_ids:
+                skipped += 1
+                continue
 
+            if returned_date is not None:  # archived loan
+                archived_rows.append((
+                    bid, user_id, item_id,
+                    loan_date, nb_renews, issue_date, returned_date, notes,
+                    pt_id, city, at_code,
+                ))
+            else:
+                active_rows.append((bid, user_id, item_id, loan_date, renew_date,
+                                    nb_renews, issue_date, notes, returned_date))
+
+        copy_rows(dst_cur, 'loans_archives',
+                  ['id', 'user_id', 'item_id', 'date', 'nb_renews', 'expiry_at', 'returned_at',
+                   'notes', 'borrower_public_type', 'addr_city', 'account_type'],
+                  archived_rows, key='id', fresh=reset)
+        copy_rows(dst_cur, 'loans',
+                  ['id', 'user_id', 'item_id', 'date', 'renew_at', 'nb_renews', 'expiry_at',
+                   'notes', 'returned_at'],
+                  active_rows, key='id', fresh=reset)
+        active += len(active_rows)
+        archived += len(archived_rows)
+        uncommitted += len(borrows)
+        if uncommitted >= COMMIT_EVERY:
+            dst.commit()
+            uncommitted = 0
+
+    borrows_cur.close()
     dst.commit()
-    print(f"  {len(borrows)} borrows processed: {active} active loans, {archived} archived")
+    print(f"  {processed} borrows processed: {active} active loans, {archived} archived")
     if skipped:
         print(
             f"  {skipped} skipped (invalid specimen_id, or item not migrated "
@@ -1106,7 +1466,7 @@ def migrate_loans(src, dst, migrated_specimen_ids=None):
         )
 
 
-def migrate_loans_archives(src, dst, migrated_specimen_ids=None):
+def migrate_loans_archives(src, dst, migrated_specimen_ids=None, reset=False):
     """Migrate borrows_archives -> loans_archives.
 
     Legacy columns: id, item_id, date (int), nb_renews, issue_date (int),
@@ -1116,63 +1476,67 @@ def migrate_loans_archives(src, dst, migrated_specimen_ids=None):
     account_type_id -> account_type (slug), no user_id in source
     """
     print("Migrating borrows_archives -> loans_archives...")
-    src_cur = src.cursor()
     dst_cur = dst.cursor()
 
     # Load public_type FK mapping from target
     dst_cur.execute("SELECT id, name FROM public_types")
     pt_name_to_id = {name: pid for pid, name in dst_cur.fetchall()}
 
-    src_cur.execute("""
-        SELECT id, item_id, specimen_id, date, nb_renews, issue_date,
-               returned_date, notes, borrower_public_type,
-               addr_city, account_type_id
-        FROM borrows_archives
+    archives_cur = src.cursor(name='mig_borrows_archives')
+    archives_cur.execute(f"""
+        WITH at_map(id, code) AS ({values_list(dst_cur, ACCOUNT_TYPE_ID_TO_CODE)}),
+             pt_map(id, pt_id) AS ({values_list(dst_cur, public_type_map(pt_name_to_id))})
+        SELECT a.id, a.item_id, a.specimen_id,
+               to_timestamp(NULLIF(a.date, 0)) AS date,
+               a.nb_renews,
+               to_timestamp(NULLIF(a.issue_date, 0)) AS issue_date,
+               to_timestamp(NULLIF(a.returned_date, 0)) AS returned_date,
+               a.notes, pt_map.pt_id AS borrower_public_type,
+               a.addr_city, COALESCE(at_map.code, 'guest') AS account_type
+        FROM borrows_archives a
+        LEFT JOIN at_map ON at_map.id = a.account_type_id
+        LEFT JOIN pt_map ON pt_map.id = a.borrower_public_type
     """)
-    rows = src_cur.fetchall()
 
+    BATCH = 1000
+    processed = 0
     migrated = 0
     skipped = 0
+    uncommitted = 0
 
-    for row in rows:
-        vals = list(row)
-        item_id = legacy_fk_id(vals[2])  # legacy specimen_id -> items.id; 0 means no copy
-        at_id = vals[10]
-        pt_raw = vals[8]
+    for rows in prefetch_pages(archives_cur, BATCH):
+        processed += len(rows)
+        archive_rows = []
 
-        if item_id is None:
-            skipped += 1
-            continue
-        if migrated_specimen_ids is not None and item_id not in migrated_specimen_ids:
-            skipped += 1
-            continue
+        for (aid, _, specimen_id, loan_date, nb_renews, issue_date,
+             returned_date, notes, pt_id, addr_city, at_code) in rows:
+            item_id = legacy_fk_id(specimen_id)  # legacy specimen_id -> items.id; 0 means no copy
+
+            if item_id is None:
+                skipped += 1
+                continue
+            if migrated_specimen_ids is not None and item_id not in migrated_specimen_ids:
+                skipped += 1
+                continue
 
-        date_val = ts_to_datetime(vals[3])
-        issue_dt = ts_to_datetime(vals[5])
-        returned_dt = ts_to_datetime(vals[6])
-        at_code = ACCOUNT_TYPE_ID_TO_CODE.get(at_id, 'guest') if at_id else 'guest'
-
-        pt_id = None
-        if pt_raw is not None:
-            pt_name = PUBLIC_TYPE_INT_TO_NAME.get(int(pt_raw))
-            if pt_name:
-                pt_id = pt_name_to_id.get(pt_name)
-
-        dst_cur.execute("""
-            INSERT INTO loans_archives (
-                id, item_id, date, nb_renews, expiry_at,
-                returned_at, notes, borrower_public_type,
-                addr_city, account_type
-            ) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
-            ON CONFLICT (id) DO NOTHING
-        """, (
-            vals[0], item_id, date_val, vals[4], issue_dt,
-            returned_dt, vals[7], pt_id, vals[9], at_code,
-        ))
-        migrated += 1
+            archive_rows.append((
+                aid, item_id, loan_date, nb_renews, issue_date,
+                returned_date, notes, pt_id, addr_city, at_code,
+            ))
 
+        copy_rows(dst_cur, 'loans_archives',
+                  ['id', 'item_id', 'date', 'nb_renews', 'expiry_at', 'returned_at', 'notes',
+                   'borrower_public_type', 'addr_city', 'account_type'],
+                  archive_rows, key='id', fresh=reset)
+        migrated += len(archive_rows)
+        uncommitted += len(rows)
+        if uncommitted >= COMMIT_EVERY:
+            dst.commit()
+            uncommitted = 0
+
+    archives_cur.close()
     dst.commit()
-    print(f"  {migrated}/{len(rows)} loans_archives migrated")
+    print(f"  {migrated}/{processed} loans_archives migrated")
     if skipped:
         print(
             f"  {skipped} skipped (invalid specimen_id, or item not migrated "
@@ -1192,28 +1556,29 @@ def migrate_loans_settings(src, dst):
     """)
     rows = src_cur.fetchall()
 
-    for row in rows:
-        sid, media_type, nb_max, nb_renews, duration, notes = row
-        media_type_db = map_media_type(media_type)
-
-        dst_cur.execute(
-            """
-            UPDATE loans_settings SET
-                media_type = %s, nb_max = %s, nb_renews = %s, duration = %s, notes = %s,
-                renew_at = 'now'
-            WHERE id = %s
-            """,
-            (media_type_db, nb_max, nb_renews, duration, notes, sid),
-        )
-        if dst_cur.rowcount == 0:
-            dst_cur.execute(
-                """
-                INSERT INTO loans_settings (id, media_type, nb_max, nb_renews, duration, notes, renew_at)
-                VALUES (%s, %s, %s, %s, %s, %s, 'now')
-                """,
-                (sid, media_type_db, nb_max, nb_renews, duration, notes),
-            )
+    # Update-else-insert: UPDATE every row by id, then INSERT the ids that did
+    # not exist yet. Both statements are prepared once and sent in pages.
+    update_sql = prepare_statement(dst_cur, 'mig_loans_settings_upd', """
+        UPDATE loans_settings SET
+            media_type = $1, nb_max = $2, nb_renews = $3, duration = $4, notes = $5,
+            renew_at = 'now'
+        WHERE id = $6
+    """, 6)
+    insert_sql = prepare_statement(dst_cur, 'mig_loans_settings_ins', """
+        INSERT INTO loans_settings (id, media_type, nb_max, nb_renews, duration, notes, renew_at)
+        VALUES ($1, $2, $3, $4, $5, $6, 'now')
+        ON CONFLICT (id) DO NOTHING
+    """, 6)
+
+    settings = [
+        (sid, map_media_type(media_type), nb_max, nb_renews, duration, notes)
+        for sid, media_type, nb_max, nb_renews, duration, notes in rows
+    ]
+    execute_batch(dst_cur, update_sql, [(*row[1:], row[0]) for row in settings])
+    execute_batch(dst_cur, insert_sql, settings)
 
+    dst_cur.execute("DEALLOCATE mig_loans_settings_upd")
+    dst_cur.execute("DEALLOCATE mig_loans_settings_ins")
     dst.commit()
     print(f"  {len(rows)} loans_settings migrated")
 
@@ -1231,24 +1596,41 @@ def migrate_z3950servers(src, dst):
     """)
     rows = src_cur.fetchall()
 
+    server_rows = []
     for row in rows:
         (zid, address, port, name, description, activated_raw,
          login, password, database, fmt) = row
         activated = bool(activated_raw) if activated_raw is not None else True
+        server_rows.append((zid, address, port, name, description, activated,
+                            login, password, database, fmt))
 
-        dst_cur.execute("""
-            INSERT INTO z3950servers (
-                id, address, port, name, description, activated,
-                login, password, database, format, encoding
-            ) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s, 'utf-8')
-            ON CONFLICT (id) DO NOTHING
-        """, (zid, address, port, name, description, activated,
-              login, password, database, fmt))
+    batch_insert(dst_cur, """
+        INSERT INTO z3950servers (
+            id, address, port, name, description, activated,
+            login, password, database, format, encoding
+        ) VALUES %s
+        ON CONFLICT (id) DO NOTHING
+    """, server_rows, template=f"({', '.join(['%s'] * 10)}, 'utf-8')")
 
     dst.commit()
     print(f"  {len(rows)} z3950servers migrated")
 
 
+def migrate_items_and_loans(src, dst, skip_items=False, reset=False):
+    """Migrate biblios/items and specimens, then borrows and borrows_archives.
+
+    One chain because each step needs the previous one's result: loans only
+    keep copies that were actually migrated.
+    """
+    migrated_specimen_ids = None
+    if not skip_items:
+        skipped_biblio_ids = migrate_items(src, dst, reset=reset)
+        migrated_specimen_ids = migrate_specimens(src, dst, skipped_biblio_ids, reset=reset)
+
+    migrate_loans(src, dst, migrated_specimen_ids, reset=reset)
+    migrate_loans_archives(src, dst, migrated_specimen_ids, reset=reset)
+
+
 def reset_sequences(conn):
     """Reset all sequences to their max ID value."""
     print("Resetting sequences...")
@@ -1263,19 +1645,65 @@ def reset_sequences(conn):
         'equipment', 'events', 'audit_log',
     ]
 
-    for table in tables:
-        try:
-            cur.execute(
-                f"SELECT setval('{table}_id_seq', "
-                f"COALESCE((SELECT MAX(id) FROM {table}), 1), true)"
-            )
-        except Exception:
-            conn.rollback()
+    # One round trip for all tables. The sequences come from pg_depend (the
+    # ones owned by an id column, serial or identity), so missing tables and
+    # tables without one are skipped without probing names.
+    cur.execute(f"""
+        DO $$
+        DECLARE
+            tbl text;
+            seq text;
+        BEGIN
+            FOR tbl, seq IN
+                SELECT d.refobjid::regclass::text, d.objid::regclass::text
+                FROM pg_depend d
+                JOIN pg_class s ON s.oid = d.objid AND s.relkind = 'S'
+                JOIN pg_attribute a ON a.attrelid = d.refobjid AND a.attnum = d.refobjsubid
+                WHERE d.classid = 'pg_class'::regclass
+                  AND d.refclassid = 'pg_class'::regclass
+                  AND d.deptype IN ('a', 'i')
+                  AND a.attname = 'id'
+                  AND d.refobjid IN (SELECT to_regclass(t)
+                                     FROM unnest({cur.mogrify('%s::text[]', (tables,)).decode()}) AS t)
+            LOOP
+                EXECUTE format('SELECT setval(%L, COALESCE((SELECT MAX(id) FROM %s), 1), true)',
+                               seq, tbl);
+            END LOOP;
+        END
+        $$
+    """)
 
     conn.commit()
     print("  Sequences reset")
 
 
+def _run_stage(source_db, target_db, func, args, kwargs):
+    """Worker entry point: run one migrate_* on connections of its own."""
+    src = connect_db(source_db)
+    src.set_session(readonly=True)
+    dst = connect_db(target_db)
+    try:
+        configure_bulk_session(dst)
+        return func(src, dst, *args, **kwargs)
+    finally:
+        src.close()
+        dst.close()
+
+
+def run_stages(stages, src, dst, source_db, target_db, jobs=1):
+    """Run independent (func, args, kwargs) migrations; returns their results in order.
+
+    With jobs > 1 each stage runs in a worker process with its own
+    connections (psycopg2 connections cannot be shared across processes).
+    """
+    if jobs <= 1 or len(stages) <= 1:
+        return [func(src, dst, *args, **kwargs) for func, args, kwargs in stages]
+    with ProcessPoolExecutor(max_workers=min(jobs, len(stages))) as pool:
+        futures = [pool.submit(_run_stage, source_db, target_db, func, args, kwargs)
+                   for func, args, kwargs in stages]
+        return [f.result() for f in futures]
+
+
 # =============================================================================
 # MAIN
 # =============================================================================
@@ -1302,6 +1730,10 @@ Examples:
     parser.add_argument('--skip-items', action='store_true', help='Skip items/specimens migration')
     parser.add_argument('--skip-users', action='store_true', help='Skip users migration')
     parser.add_argument('--no-hash', action='store_true', help='Skip password hashing (migrate plaintext)')
+    parser.add_argument('--share-password-hashes', action='store_true',
+                        help='Hash each distinct password once (faster; users sharing a password get equal hashes)')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='Run independent table migrations in N worker processes (e.g. 6)')
     parser.add_argument('-y', '--yes', action='store_true', help='Skip confirmation prompts')
     args = parser.parse_args()
 
@@ -1315,7 +1747,7 @@ Examples:
     print(f"Source: {args.source_db}")
     print(f"Target: {args.target_db}")
     print(f"Options: reset={args.reset}, hash={hash_passwords}, "
-          f"skip_items={args.skip_items}, skip_users={args.skip_users}")
+          f"skip_items={args.skip_items}, skip_users={args.skip_users}, jobs={args.jobs}")
     print()
 
     if hash_passwords and not ARGON2_AVAILABLE:
@@ -1332,36 +1764,51 @@ Examples:
 
     try:
         src = connect_db(args.source_db)
+        src.set_session(readonly=True)  # the legacy database is only ever read
         dst = connect_db(args.target_db)
+        configure_bulk_session(dst)
         print("Connected to databases")
         print()
 
+        # A fresh target has no rows to protect: load without secondary
+        # indexes/FKs and rebuild them once at the end (rerun --reset on failure)
+        bulk_load_ddl = None
         if args.reset:
             reset_target_database(dst)
+            bulk_load_ddl = drop_bulk_load_indexes(dst)
+            unlogged_tables = set_unlogged(dst)
+            set_autovacuum(dst, False)
             print()
 
-        # Migrate in dependency order
-        migrate_account_types(src, dst)
-        migrate_fees(src, dst)
-
+        # Migrate in dependency order; each run_stages() call is a group of
+        # independent migrations that can run side by side (--jobs). On
+        # --reset the target is empty: loaders try plain INSERT/COPY first.
+        run_stages([(migrate_account_types, (), {}), (migrate_fees, (), {})],
+                   src, dst, args.source_db, args.target_db, args.jobs)
+
+        run_stages([
+            (migrate_simple_table, ('authors', ['id', 'key', 'lastname', 'firstname', 'bio', 'notes']),
+             {'reset': args.reset}),
+            (migrate_editions, (), {'reset': args.reset}),
+            (migrate_collections, (), {'reset': args.reset}),
+            (migrate_simple_table, ('series', ['id', 'key', 'name']), {'reset': args.reset}),
+            (migrate_simple_table, ('sources', ['id', 'key', 'name']), {'reset': args.reset}),
+            (migrate_loans_settings, (), {}),
+            (migrate_z3950servers, (), {}),
+        ], src, dst, args.source_db, args.target_db, args.jobs)
+
+        # Users only need account_types/fees, so they are hashed and loaded
+        # while the items -> loans chain runs on the catalog tables.
+        stages = [(migrate_items_and_loans, (), {'skip_items': args.skip_items, 'reset': args.reset})]
         if not args.skip_users:
-            migrate_users(src, dst, hash_passwords=hash_passwords)
-
-        migrate_simple_table(src, dst, 'authors', ['id', 'key', 'lastname', 'firstname', 'bio', 'notes'])
-        migrate_editions(src, dst)
-        migrate_collections(src, dst)
-        migrate_simple_table(src, dst, 'series', ['id', 'key', 'name'])
-        migrate_simple_table(src, dst, 'sources', ['id', 'key', 'name'])
-
-        migrated_specimen_ids = None
-        if not args.skip_items:
-            skipped_biblio_ids = migrate_items(src, dst)
-            migrated_specimen_ids = migrate_specimens(src, dst, skipped_biblio_ids)
-
-        migrate_loans(src, dst, migrated_specimen_ids)
-        migrate_loans_archives(src, dst, migrated_specimen_ids)
-        migrate_loans_settings(src, dst)
-        migrate_z3950servers(src, dst)
+            stages.insert(0, (migrate_users, (), {'hash_passwords': hash_passwords, 'reset': args.reset,
+                                             'share_hashes': args.share_password_hashes}))
+        run_stages(stages, src, dst, args.source_db, args.target_db, args.jobs)
+
+        if bulk_load_ddl is not None:
+            set_logged(dst, unlogged_tables)
+            restore_bulk_load_indexes(dst, bulk_load_ddl, args.target_db, args.jobs)
+            set_autovacuum(dst, True)
 
         reset_sequences(dst)
 